@@ -5,10 +5,15 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
+from pydantic import BaseModel
+from urllib.parse import quote, urlencode
+import hashlib
+import orjson
 import os
+import threading
 from pathlib import Path
 
 app = FastAPI(title="Mergington High School API",
@@ -25,67 +30,123 @@ activities = {
         "description": "Learn tennis techniques and compete in matches",
         "schedule": "Wednesdays and Saturdays, 4:00 PM - 5:30 PM",
         "max_participants": 16,
-        "participants": ["alex@mergington.edu"]
+        "participants": {"alex@mergington.edu"}
         },
         "Basketball Team": {
         "description": "Join our competitive basketball team",
         "schedule": "Mondays and Thursdays, 4:00 PM - 5:30 PM",
         "max_participants": 15,
-        "participants": ["marcus@mergington.edu", "jordan@mergington.edu"]
+        "participants": {"marcus@mergington.edu", "jordan@mergington.edu"}
         },
         "Art Club": {
         "description": "Explore painting, drawing, and sculpture",
         "schedule": "Tuesdays and Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 18,
-        "participants": ["isabella@mergington.edu"]
+        "participants": {"isabella@mergington.edu"}
         },
         "Music Ensemble": {
         "description": "Play instruments and perform in concerts",
         "schedule": "Wednesdays, 3:30 PM - 4:30 PM",
         "max_participants": 25,
-        "participants": ["lucas@mergington.edu", "ava@mergington.edu"]
+        "participants": {"lucas@mergington.edu", "ava@mergington.edu"}
         },
         "Debate Team": {
         "description": "Develop argumentation and public speaking skills",
         "schedule": "Mondays and Wednesdays, 3:30 PM - 4:30 PM",
         "max_participants": 14,
-        "participants": ["noah@mergington.edu"]
+        "participants": {"noah@mergington.edu"}
         },
         "Science Club": {
         "description": "Conduct experiments and explore scientific concepts",
         "schedule": "Thursdays, 3:30 PM - 5:00 PM",
         "max_participants": 20,
-        "participants": ["grace@mergington.edu", "ethan@mergington.edu"]
+        "participants": {"grace@mergington.edu", "ethan@mergington.edu"}
         },
     "Chess Club": {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        "participants": {"michael@mergington.edu", "daniel@mergington.edu"}
     },
     "Programming Class": {
         "description": "Learn programming fundamentals and build software projects",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
         "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+        "participants": {"emma@mergington.edu", "sophia@mergington.edu"}
     },
     "Gym Class": {
         "description": "Physical education and sports activities",
         "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
         "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+        "participants": {"john@mergington.edu", "olivia@mergington.edu"}
     }
 }
 
 
+# Serialized GET /activities payload and its ETag, rebuilt lazily after changes.
+# The generation is bumped on every invalidation so a GET that built its payload
+# before a concurrent change does not store stale bytes.
+_activities_cache: bytes | None = None
+_activities_etag: str | None = None
+_cache_generation = 0
+_cache_lock = threading.Lock()
+
+
+def invalidate_activities_cache():
+    """Drop the cached GET /activities payload after activities change"""
+    global _activities_cache, _activities_etag, _cache_generation
+    with _cache_lock:
+        _activities_cache = None
+        _activities_etag = None
+        _cache_generation += 1
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag using weak comparison"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+class BatchOperation(BaseModel):
+    """A single sub-request executed by the batch endpoint"""
+    method: str
+    path: str
+    query: dict[str, str] = {}
+
+
 @app.get("/")
 def root():
     return RedirectResponse(url="/static/index.html")
 
 
 @app.get("/activities")
-def get_activities():
-    return activities
+def get_activities(request: Request):
+    global _activities_cache, _activities_etag
+    with _cache_lock:
+        payload, etag, generation = _activities_cache, _activities_etag, _cache_generation
+    if payload is None:
+        # Participants are stored as sets; return them as sorted lists
+        payload = orjson.dumps({
+            name: {**details, "participants": sorted(details["participants"])}
+            for name, details in activities.items()
+        })
+        etag = f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+        with _cache_lock:
+            # Only cache if nothing changed while the payload was being built
+            if _cache_generation == generation:
+                _activities_cache, _activities_etag = payload, etag
+
+    headers = {"ETag": etag}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
 
 
 @app.post("/activities/{activity_name}/signup")
@@ -103,7 +164,8 @@ def signup_for_activity(activity_name: str, email: str):
 
 
     # Add student
-    activity["participants"].append(email)
+    activity["participants"].add(email)
+    invalidate_activities_cache()
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
@@ -121,5 +183,61 @@ def unregister_from_activity(activity_name: str, email: str):
         raise HTTPException(status_code=400, detail="Student is not registered for this activity")
 
     # Remove student
-    activity["participants"].remove(email)
+    activity["participants"].discard(email)
+    invalidate_activities_cache()
     return {"message": f"Unregistered {email} from {activity_name}"}
+
+
+@app.post("/activities/batch")
+async def batch(operations: list[BatchOperation]):
+    """Run several API calls in one request, in order, and return their results"""
+    # Validate every operation up front so a rejected batch changes nothing
+    if any(operation.path.rstrip("/") == "/activities/batch" for operation in operations):
+        raise HTTPException(status_code=400, detail="Batch requests cannot be nested")
+
+    results = []
+    for operation in operations:
+        results.append(await _dispatch(operation))
+    return results
+
+
+async def _dispatch(operation: BatchOperation):
+    """Send a sub-request through the app and capture its status and body"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": operation.method.upper(),
+        "scheme": "http",
+        "path": operation.path,
+        "raw_path": quote(operation.path).encode(),
+        "root_path": "",
+        "query_string": urlencode(operation.query).encode(),
+        "headers": [],
+    }
+    status_code = None
+    content_type = ""
+    body = b""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code, content_type, body
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            body += message.get("body", b"")
+
+    # Go through the full app (not just app.router) so middleware and
+    # exception handlers turn HTTPExceptions into regular responses
+    await app(scope, receive, send)
+    if not body:
+        return {"status_code": status_code, "body": None}
+    # Only JSON responses are decoded; anything else (e.g. static files) is returned as text
+    if content_type.split(";")[0].strip().lower() == "application/json":
+        return {"status_code": status_code, "body": orjson.loads(body)}
+    return {"status_code": status_code, "body": body.decode("utf-8", errors="replace")}
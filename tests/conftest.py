@@ -1,88 +1,202 @@
 """Pytest configuration and fixtures for testing the FastAPI app."""
 
+from contextlib import contextmanager
+from functools import lru_cache
+
 import pytest
 from fastapi.testclient import TestClient
-import sys
-from pathlib import Path
+from httpx import ASGITransport, AsyncClient
 
-# Add src directory to path so we can import app
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from app import app, activities, invalidate_activities_cache
+from tests.endpoints import ACTIVITIES
 
-from app import app, activities
+# Initial state of the in-memory activity database
+_ORIGINAL = {
+    "Tennis Club": {
+        "description": "Learn tennis techniques and compete in matches",
+        "schedule": "Wednesdays and Saturdays, 4:00 PM - 5:30 PM",
+        "max_participants": 16,
+        "participants": {"alex@mergington.edu"}
+    },
+    "Basketball Team": {
+        "description": "Join our competitive basketball team",
+        "schedule": "Mondays and Thursdays, 4:00 PM - 5:30 PM",
+        "max_participants": 15,
+        "participants": {"marcus@mergington.edu", "jordan@mergington.edu"}
+    },
+    "Art Club": {
+        "description": "Explore painting, drawing, and sculpture",
+        "schedule": "Tuesdays and Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 18,
+        "participants": {"isabella@mergington.edu"}
+    },
+    "Music Ensemble": {
+        "description": "Play instruments and perform in concerts",
+        "schedule": "Wednesdays, 3:30 PM - 4:30 PM",
+        "max_participants": 25,
+        "participants": {"lucas@mergington.edu", "ava@mergington.edu"}
+    },
+    "Debate Team": {
+        "description": "Develop argumentation and public speaking skills",
+        "schedule": "Mondays and Wednesdays, 3:30 PM - 4:30 PM",
+        "max_participants": 14,
+        "participants": {"noah@mergington.edu"}
+    },
+    "Science Club": {
+        "description": "Conduct experiments and explore scientific concepts",
+        "schedule": "Thursdays, 3:30 PM - 5:00 PM",
+        "max_participants": 20,
+        "participants": {"grace@mergington.edu", "ethan@mergington.edu"}
+    },
+    "Chess Club": {
+        "description": "Learn strategies and compete in chess tournaments",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 12,
+        "participants": {"michael@mergington.edu", "daniel@mergington.edu"}
+    },
+    "Programming Class": {
+        "description": "Learn programming fundamentals and build software projects",
+        "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
+        "max_participants": 20,
+        "participants": {"emma@mergington.edu", "sophia@mergington.edu"}
+    },
+    "Gym Class": {
+        "description": "Physical education and sports activities",
+        "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
+        "max_participants": 30,
+        "participants": {"john@mergington.edu", "olivia@mergington.edu"}
+    }
+}
 
 
-@pytest.fixture
-def client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
+# (participants, added, removed) for every membership change since the last reset
+_CHANGE_LOG = []
 
+_SET_MUTATORS = (
+    "add", "discard", "remove", "pop", "clear", "update",
+    "difference_update", "intersection_update", "symmetric_difference_update",
+    "__ior__", "__iand__", "__isub__", "__ixor__",
+)
 
-@pytest.fixture
-def reset_activities():
-    """Reset activities to initial state before each test."""
-    original_activities = {
-        "Tennis Club": {
-            "description": "Learn tennis techniques and compete in matches",
-            "schedule": "Wednesdays and Saturdays, 4:00 PM - 5:30 PM",
-            "max_participants": 16,
-            "participants": ["alex@mergington.edu"]
-        },
-        "Basketball Team": {
-            "description": "Join our competitive basketball team",
-            "schedule": "Mondays and Thursdays, 4:00 PM - 5:30 PM",
-            "max_participants": 15,
-            "participants": ["marcus@mergington.edu", "jordan@mergington.edu"]
-        },
-        "Art Club": {
-            "description": "Explore painting, drawing, and sculpture",
-            "schedule": "Tuesdays and Fridays, 3:30 PM - 5:00 PM",
-            "max_participants": 18,
-            "participants": ["isabella@mergington.edu"]
-        },
-        "Music Ensemble": {
-            "description": "Play instruments and perform in concerts",
-            "schedule": "Wednesdays, 3:30 PM - 4:30 PM",
-            "max_participants": 25,
-            "participants": ["lucas@mergington.edu", "ava@mergington.edu"]
-        },
-        "Debate Team": {
-            "description": "Develop argumentation and public speaking skills",
-            "schedule": "Mondays and Wednesdays, 3:30 PM - 4:30 PM",
-            "max_participants": 14,
-            "participants": ["noah@mergington.edu"]
-        },
-        "Science Club": {
-            "description": "Conduct experiments and explore scientific concepts",
-            "schedule": "Thursdays, 3:30 PM - 5:00 PM",
-            "max_participants": 20,
-            "participants": ["grace@mergington.edu", "ethan@mergington.edu"]
-        },
-        "Chess Club": {
-            "description": "Learn strategies and compete in chess tournaments",
-            "schedule": "Fridays, 3:30 PM - 5:00 PM",
-            "max_participants": 12,
-            "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
-        },
-        "Programming Class": {
-            "description": "Learn programming fundamentals and build software projects",
-            "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
-            "max_participants": 20,
-            "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
-        },
-        "Gym Class": {
-            "description": "Physical education and sports activities",
-            "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
-            "max_participants": 30,
-            "participants": ["john@mergington.edu", "olivia@mergington.edu"]
-        }
+
+class _LoggedSet(set):
+    """Participant set that records every change so tests can undo it."""
+
+
+def _logged(name):
+    """Wrap a set mutator so the emails it adds and removes are logged."""
+    method = getattr(set, name)
+
+    def wrapper(self, *args):
+        before = set(self)
+        result = method(self, *args)
+        added, removed = self - before, before - self
+        if added or removed:
+            _CHANGE_LOG.append((self, added, removed))
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in _SET_MUTATORS:
+    setattr(_LoggedSet, _name, _logged(_name))
+
+
+def _reset_snapshot():
+    """Build a fresh copy of _ORIGINAL; only the participant sets are mutable."""
+    return {
+        name: {**details, "participants": _LoggedSet(details["participants"])}
+        for name, details in _ORIGINAL.items()
     }
-    
-    # Clear and reset activities
+
+
+def _reset():
+    """Restore the activities database to its initial state.
+
+    Each pytest-xdist worker is its own process with its own copy of the
+    store, so this only needs to cover the current process (``pytest -n auto``).
+    """
     activities.clear()
-    activities.update(original_activities)
-    
+    activities.update(_reset_snapshot())
+    invalidate_activities_cache()
+    _CHANGE_LOG.clear()
+
+
+def _rewind():
+    """Undo the logged participant changes, newest first."""
+    if not _CHANGE_LOG:
+        return
+    while _CHANGE_LOG:
+        participants, added, removed = _CHANGE_LOG.pop()
+        # Call the plain set methods so undoing is not logged again
+        set.difference_update(participants, added)
+        set.update(participants, removed)
+    invalidate_activities_cache()
+
+
+@contextmanager
+def _restored_activities():
+    """Undo any logged API changes before and after the block."""
+    _rewind()
+    try:
+        yield
+    finally:
+        _rewind()
+
+
+@lru_cache(maxsize=None)
+def _make_client(asgi_app):
+    """Build and start a TestClient for an app once; later calls reuse it."""
+    return TestClient(asgi_app).__enter__()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Create a single test client for the FastAPI app, shared by all tests."""
+    yield _make_client(app)
+    # Shut the client down and forget it, so the cache never hands out a closed client
+    _make_client(app).__exit__(None, None, None)
+    _make_client.cache_clear()
+
+
+@pytest.fixture(scope="module")
+async def activities_snapshot(aclient):
+    """Fetch GET /activities once per module and share the parsed JSON."""
+    response = await aclient.get(ACTIVITIES)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run async tests on asyncio only."""
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def aclient():
+    """Create a shared async client that calls the ASGI app directly, without a thread portal."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def reset_activities_fn():
+    """Return the reset helper, e.g. as a benchmark setup that runs outside timing."""
+    return _reset
+
+
+@pytest.fixture(scope="module")
+def module_activities():
+    """Fully reset activities once per module, installing the logged participant sets."""
+    _reset()
     yield
-    
-    # Reset after test
-    activities.clear()
-    activities.update(original_activities)
+    _reset()
+
+
+@pytest.fixture
+def reset_activities(module_activities):
+    """Restore activities around each test by undoing the changes it made."""
+    with _restored_activities():
+        yield
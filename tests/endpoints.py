@@ -0,0 +1,14 @@
+"""Endpoint paths shared by the API tests and benchmarks."""
+
+ACTIVITIES = "/activities"
+BATCH = "/activities/batch"
+INDEX_PAGE = "/static/index.html"
+
+TENNIS_SIGNUP = "/activities/Tennis Club/signup"
+TENNIS_UNREGISTER = "/activities/Tennis Club/unregister"
+BASKETBALL_SIGNUP = "/activities/Basketball Team/signup"
+CHESS_SIGNUP = "/activities/Chess Club/signup"
+ART_SIGNUP = "/activities/Art Club/signup"
+ART_UNREGISTER = "/activities/Art Club/unregister"
+NONEXISTENT_SIGNUP = "/activities/Nonexistent Club/signup"
+NONEXISTENT_UNREGISTER = "/activities/Nonexistent Club/unregister"
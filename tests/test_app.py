@@ -1,72 +1,122 @@
 """Tests for the Mergington High School Activities API."""
 
+import types
+
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 
+import app as app_module
+from tests.endpoints import (
+    ACTIVITIES,
+    ART_SIGNUP,
+    ART_UNREGISTER,
+    BASKETBALL_SIGNUP,
+    BATCH,
+    CHESS_SIGNUP,
+    INDEX_PAGE,
+    NONEXISTENT_SIGNUP,
+    NONEXISTENT_UNREGISTER,
+    TENNIS_SIGNUP,
+    TENNIS_UNREGISTER,
+)
+
+REQUIRED_FIELDS = frozenset({"description", "schedule", "max_participants", "participants"})
+
 
 class TestGetActivities:
     """Tests for GET /activities endpoint."""
     
-    def test_get_activities_success(self, client, reset_activities):
+    @pytest.mark.anyio
+    async def test_get_activities_success(self, activities_snapshot):
         """Test successfully retrieving all activities."""
-        response = client.get("/activities")
-        assert response.status_code == 200
-        data = response.json()
+        data = activities_snapshot
         
         # Check that we have the expected activities
         assert "Tennis Club" in data
         assert "Basketball Team" in data
         assert "Art Club" in data
         
-    def test_get_activities_has_required_fields(self, client, reset_activities):
+    @pytest.mark.anyio
+    async def test_get_activities_has_required_fields(self, activities_snapshot):
         """Test that each activity has required fields."""
-        response = client.get("/activities")
-        data = response.json()
+        data = activities_snapshot
         
         for activity_name, details in data.items():
-            assert "description" in details
-            assert "schedule" in details
-            assert "max_participants" in details
-            assert "participants" in details
+            assert REQUIRED_FIELDS <= details.keys()
             
-    def test_get_activities_participants_list(self, client, reset_activities):
+    @pytest.mark.anyio
+    async def test_get_activities_participants_list(self, activities_snapshot):
         """Test that participants are returned as a list."""
-        response = client.get("/activities")
-        data = response.json()
+        data = activities_snapshot
         
         for activity_name, details in data.items():
             assert isinstance(details["participants"], list)
+            
+    @pytest.mark.anyio
+    async def test_get_activities_not_modified(self, aclient):
+        """Test that a matching ETag returns 304 without a body."""
+        etag = (await aclient.get(ACTIVITIES)).headers["etag"]
+        response = await aclient.get(ACTIVITIES, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        
+    @pytest.mark.anyio
+    async def test_get_activities_not_modified_weak_etag_list(self, aclient):
+        """Test that a weak ETag inside an If-None-Match list also returns 304."""
+        etag = (await aclient.get(ACTIVITIES)).headers["etag"]
+        response = await aclient.get(ACTIVITIES, headers={"If-None-Match": f'"other", W/{etag}'})
+        assert response.status_code == 304
+        
+    def test_get_activities_does_not_cache_stale_payload(self, client, monkeypatch):
+        """Test that a change made while the payload is built is not cached."""
+        app_module.invalidate_activities_cache()
+
+        def dumps_then_change(obj):
+            payload = orjson.dumps(obj)
+            app_module.invalidate_activities_cache()
+            return payload
+
+        monkeypatch.setattr(app_module, "orjson", types.SimpleNamespace(dumps=dumps_then_change))
+        assert client.get(ACTIVITIES).status_code == 200
+        assert app_module._activities_cache is None
+        
+    def test_get_activities_etag_changes_after_signup(self, client, reset_activities):
+        """Test that signing up invalidates the cached response."""
+        etag = client.get(ACTIVITIES).headers["etag"]
+        client.post(TENNIS_SIGNUP, params={"email": "newstudent@mergington.edu"})
+        response = client.get(ACTIVITIES, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert "newstudent@mergington.edu" in response.json()["Tennis Club"]["participants"]
 
 
 class TestSignupForActivity:
     """Tests for POST /activities/{activity_name}/signup endpoint."""
     
-    def test_signup_success(self, client, reset_activities):
-        """Test successfully signing up for an activity."""
-        response = client.post(
-            "/activities/Tennis Club/signup?email=newstudent@mergington.edu"
-        )
-        assert response.status_code == 200
-        data = response.json()
-        assert "Signed up" in data["message"]
-        assert "newstudent@mergington.edu" in data["message"]
-        
-    def test_signup_adds_participant(self, client, reset_activities):
-        """Test that signup actually adds the participant to the activity."""
-        response = client.post(
-            "/activities/Tennis Club/signup?email=newstudent@mergington.edu"
-        )
-        assert response.status_code == 200
+    @pytest.mark.parametrize("signups, email", [
+        ((("Tennis Club", TENNIS_SIGNUP),), "newstudent@mergington.edu"),
+        ((("Chess Club", CHESS_SIGNUP),), "newstudent@mergington.edu"),
+        ((("Tennis Club", TENNIS_SIGNUP), ("Basketball Team", BASKETBALL_SIGNUP)), "multi@mergington.edu"),
+    ])
+    def test_signup(self, client, reset_activities, signups, email):
+        """Test signing up for one or more activities adds the participant to each."""
+        for activity_name, signup_path in signups:
+            response = client.post(signup_path, params={"email": email})
+            assert response.status_code == 200
+            data = response.json()
+            assert "Signed up" in data["message"]
+            assert email in data["message"]
         
-        # Check that participant was added
-        activities_response = client.get("/activities")
-        activities = activities_response.json()
-        assert "newstudent@mergington.edu" in activities["Tennis Club"]["participants"]
+        # Check that participant was added everywhere
+        activities = client.get(ACTIVITIES).json()
+        for activity_name, signup_path in signups:
+            assert email in activities[activity_name]["participants"]
         
     def test_signup_duplicate_email(self, client, reset_activities):
         """Test that signing up with duplicate email fails."""
         response = client.post(
-            "/activities/Tennis Club/signup?email=alex@mergington.edu"
+            TENNIS_SIGNUP, params={"email": "alex@mergington.edu"}
         )
         assert response.status_code == 400
         data = response.json()
@@ -75,33 +125,11 @@ class TestSignupForActivity:
     def test_signup_nonexistent_activity(self, client, reset_activities):
         """Test that signing up for nonexistent activity fails."""
         response = client.post(
-            "/activities/Nonexistent Club/signup?email=student@mergington.edu"
+            NONEXISTENT_SIGNUP, params={"email": "student@mergington.edu"}
         )
         assert response.status_code == 404
         data = response.json()
         assert "Activity not found" in data["detail"]
-        
-    def test_signup_multiple_different_activities(self, client, reset_activities):
-        """Test that a student can sign up for multiple different activities."""
-        student_email = "multi@mergington.edu"
-        
-        # Sign up for Tennis Club
-        response1 = client.post(
-            f"/activities/Tennis Club/signup?email={student_email}"
-        )
-        assert response1.status_code == 200
-        
-        # Sign up for Basketball Team
-        response2 = client.post(
-            f"/activities/Basketball Team/signup?email={student_email}"
-        )
-        assert response2.status_code == 200
-        
-        # Verify both signups
-        activities_response = client.get("/activities")
-        activities = activities_response.json()
-        assert student_email in activities["Tennis Club"]["participants"]
-        assert student_email in activities["Basketball Team"]["participants"]
 
 
 class TestUnregisterFromActivity:
@@ -110,7 +138,7 @@ class TestUnregisterFromActivity:
     def test_unregister_success(self, client, reset_activities):
         """Test successfully unregistering from an activity."""
         response = client.delete(
-            "/activities/Tennis Club/unregister?email=alex@mergington.edu"
+            TENNIS_UNREGISTER, params={"email": "alex@mergington.edu"}
         )
         assert response.status_code == 200
         data = response.json()
@@ -119,19 +147,19 @@ class TestUnregisterFromActivity:
     def test_unregister_removes_participant(self, client, reset_activities):
         """Test that unregister actually removes the participant."""
         response = client.delete(
-            "/activities/Tennis Club/unregister?email=alex@mergington.edu"
+            TENNIS_UNREGISTER, params={"email": "alex@mergington.edu"}
         )
         assert response.status_code == 200
         
         # Check that participant was removed
-        activities_response = client.get("/activities")
+        activities_response = client.get(ACTIVITIES)
         activities = activities_response.json()
         assert "alex@mergington.edu" not in activities["Tennis Club"]["participants"]
         
     def test_unregister_nonexistent_activity(self, client, reset_activities):
         """Test that unregistering from nonexistent activity fails."""
         response = client.delete(
-            "/activities/Nonexistent Club/unregister?email=student@mergington.edu"
+            NONEXISTENT_UNREGISTER, params={"email": "student@mergington.edu"}
         )
         assert response.status_code == 404
         data = response.json()
@@ -140,35 +168,36 @@ class TestUnregisterFromActivity:
     def test_unregister_not_registered_student(self, client, reset_activities):
         """Test that unregistering a student who isn't registered fails."""
         response = client.delete(
-            "/activities/Tennis Club/unregister?email=notregistered@mergington.edu"
+            TENNIS_UNREGISTER, params={"email": "notregistered@mergington.edu"}
         )
         assert response.status_code == 400
         data = response.json()
         assert "not registered" in data["detail"]
         
-    def test_unregister_then_signup_again(self, client, reset_activities):
+    @pytest.mark.anyio
+    async def test_unregister_then_signup_again(self, aclient, reset_activities):
         """Test that a student can unregister and then sign up again."""
         email = "alex@mergington.edu"
         
         # Unregister
-        response1 = client.delete(
-            f"/activities/Tennis Club/unregister?email={email}"
+        response1 = await aclient.delete(
+            TENNIS_UNREGISTER, params={"email": email}
         )
         assert response1.status_code == 200
         
         # Check they're unregistered
-        activities_response = client.get("/activities")
+        activities_response = await aclient.get(ACTIVITIES)
         activities = activities_response.json()
         assert email not in activities["Tennis Club"]["participants"]
         
         # Sign up again
-        response2 = client.post(
-            f"/activities/Tennis Club/signup?email={email}"
+        response2 = await aclient.post(
+            TENNIS_SIGNUP, params={"email": email}
         )
         assert response2.status_code == 200
         
         # Check they're registered again
-        activities_response = client.get("/activities")
+        activities_response = await aclient.get(ACTIVITIES)
         activities = activities_response.json()
         assert email in activities["Tennis Club"]["participants"]
 
@@ -176,29 +205,74 @@ class TestUnregisterFromActivity:
 class TestIntegration:
     """Integration tests for the API."""
     
-    def test_workflow_signup_and_unregister(self, client, reset_activities):
+    @pytest.mark.anyio
+    async def test_workflow_signup_and_unregister(self, aclient, reset_activities):
         """Test complete workflow of signing up and unregistering."""
         activity = "Art Club"
         email = "workflow@mergington.edu"
         
-        # Signup
-        signup_response = client.post(
-            f"/activities/{activity}/signup?email={email}"
-        )
-        assert signup_response.status_code == 200
+        # Signup, verify, unregister, verify in one batch
+        response = await aclient.post(BATCH, json=[
+            {"method": "POST", "path": ART_SIGNUP, "query": {"email": email}},
+            {"method": "GET", "path": ACTIVITIES},
+            {"method": "DELETE", "path": ART_UNREGISTER, "query": {"email": email}},
+            {"method": "GET", "path": ACTIVITIES},
+        ])
+        assert response.status_code == 200
+        signup_result, after_signup, unregister_result, after_unregister = response.json()
         
         # Verify signup
-        activities = client.get("/activities").json()
+        assert signup_result["status_code"] == 200
+        activities = after_signup["body"]
         assert email in activities[activity]["participants"]
         initial_count = len(activities[activity]["participants"])
         
-        # Unregister
-        unregister_response = client.delete(
-            f"/activities/{activity}/unregister?email={email}"
-        )
-        assert unregister_response.status_code == 200
-        
         # Verify unregister
-        activities = client.get("/activities").json()
+        assert unregister_result["status_code"] == 200
+        activities = after_unregister["body"]
         assert email not in activities[activity]["participants"]
         assert len(activities[activity]["participants"]) == initial_count - 1
+
+
+class TestBatch:
+    """Tests for POST /activities/batch endpoint."""
+    
+    def test_batch_reports_sub_request_errors(self, client, reset_activities):
+        """Test that failing sub-requests report their own status and detail."""
+        response = client.post(BATCH, json=[
+            {"method": "POST", "path": NONEXISTENT_SIGNUP, "query": {"email": "student@mergington.edu"}},
+        ])
+        assert response.status_code == 200
+        result, = response.json()
+        assert result["status_code"] == 404
+        assert "Activity not found" in result["body"]["detail"]
+        
+    def test_batch_returns_non_json_body_as_text(self, client):
+        """Test that non-JSON sub-responses, such as static files, come back as text."""
+        response = client.post(BATCH, json=[
+            {"method": "GET", "path": INDEX_PAGE},
+        ])
+        assert response.status_code == 200
+        result, = response.json()
+        assert result["status_code"] == 200
+        assert isinstance(result["body"], str)
+        assert "<html" in result["body"].lower()
+        
+    def test_batch_rejects_nested_batch(self, client, reset_activities):
+        """Test that a batch cannot contain another batch request."""
+        response = client.post(BATCH, json=[
+            {"method": "POST", "path": BATCH},
+        ])
+        assert response.status_code == 400
+        
+    def test_batch_rejects_nested_batch_before_running_anything(self, client, reset_activities):
+        """Test that a rejected batch does not run its earlier sub-requests."""
+        email = "batchstudent@mergington.edu"
+        response = client.post(BATCH, json=[
+            {"method": "POST", "path": TENNIS_SIGNUP, "query": {"email": email}},
+            {"method": "POST", "path": BATCH},
+        ])
+        assert response.status_code == 400
+        
+        activities = client.get(ACTIVITIES).json()
+        assert email not in activities["Tennis Club"]["participants"]
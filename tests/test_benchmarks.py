@@ -0,0 +1,47 @@
+"""Benchmarks for the Mergington High School Activities API."""
+
+import pytest
+
+from tests.endpoints import ACTIVITIES, TENNIS_SIGNUP, TENNIS_UNREGISTER
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.perf
+
+ROUNDS = 50
+
+
+class TestBenchmarks:
+    """Benchmarks of single API calls, with state resets excluded from timing."""
+    
+    def test_benchmark_signup(self, benchmark, client, reset_activities_fn):
+        """Benchmark signing up a new student for an activity."""
+        response = benchmark.pedantic(
+            client.post,
+            args=(TENNIS_SIGNUP,),
+            kwargs={"params": {"email": "newstudent@mergington.edu"}},
+            setup=reset_activities_fn,
+            rounds=ROUNDS,
+        )
+        assert response.status_code == 200
+        
+    def test_benchmark_unregister(self, benchmark, client, reset_activities_fn):
+        """Benchmark unregistering an existing participant."""
+        response = benchmark.pedantic(
+            client.delete,
+            args=(TENNIS_UNREGISTER,),
+            kwargs={"params": {"email": "alex@mergington.edu"}},
+            setup=reset_activities_fn,
+            rounds=ROUNDS,
+        )
+        assert response.status_code == 200
+        
+    def test_benchmark_get_activities(self, benchmark, client, reset_activities_fn):
+        """Benchmark listing activities right after a reset, i.e. with a cold cache."""
+        response = benchmark.pedantic(
+            client.get,
+            args=(ACTIVITIES,),
+            setup=reset_activities_fn,
+            rounds=ROUNDS,
+        )
+        assert response.status_code == 200